@@ -25,8 +25,14 @@ Output JSON:
 
 Run with:
   uvicorn src.api:app --reload --host 0.0.0.0 --port 8000
+
+Multiple workers sharing one copy of the index/metadata (copy-on-write):
+  SEARCH_PRELOAD=1 gunicorn src.api:app --preload -w 4 -k uvicorn.workers.UvicornWorker
 """
 
+import os
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 from typing import List, Dict, Any
@@ -35,8 +41,6 @@ import uvicorn
 from src.query_pipeline import QueryPipeline
 from src.explainer import explain_match
 
-app = FastAPI(title="CodeAtRandom Retrieval API", version="1.0")
-
 # instantiate pipeline once (loads FAISS index)
 _pipeline = None
 
@@ -46,6 +50,20 @@ def get_pipeline():
         _pipeline = QueryPipeline()
     return _pipeline
 
+# With a preloading server (gunicorn --preload) the module is imported in the
+# master process, so loading here lets forked workers inherit the index and
+# metadata via copy-on-write instead of each loading their own copy.
+if os.environ.get("SEARCH_PRELOAD") == "1":
+    get_pipeline()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load at startup so the first request doesn't pay for it (no-op if preloaded)
+    get_pipeline()
+    yield
+
+app = FastAPI(title="CodeAtRandom Retrieval API", version="1.0", lifespan=lifespan)
+
 class SearchRequest(BaseModel):
     query: str
     top_k: int = 5
@@ -72,14 +90,8 @@ def search(req: SearchRequest):
     # Step 4: add explanations for each result
     enriched = []
     for r in results:
-        doc_text = ""
-        try:
-            with open(r["path"], "r", encoding="utf-8") as f:
-                doc_text = f.read()
-        except Exception:
-            doc_text = ""
-
-        explanation = explain_match(req.query, doc_text)
+        # Keywords + token count were precomputed into metadata: no file access
+        explanation = explain_match(req.query, pipeline.metadata[r["doc_id"]])
         enriched.append({
             "doc_id": r["doc_id"],
             "score": r["score"],
@@ -7,80 +7,218 @@ According to the assignment requirements:
 - If a document's hash hasn't changed, reuse the cached embedding
 - If the hash changed, regenerate the embedding
 
-We use JSON for simplicity, readability, and portability.
+Storage layout:
+- cache/embeddings.npy : one (capacity, dim) float32 matrix, memory-mapped
+- cache/meta.msgpack   : {doc_id: {"row": int, "hash": str, "updated_at": int}}
+
+Embeddings never go through a text format, so loading the cache is a single
+mmap instead of parsing every float, and updates only rewrite the small
+metadata file. A cache left by the old JSON format (cache/embeddings.json) can
+be imported once (import_legacy_json, called by the index builder) so existing
+embeddings are not recomputed.
 """
 
-import json
+import os
 import time
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Iterable, Tuple
+
+import msgpack
+import numpy as np
+import orjson
 
-# Cache file location (ignored by Git)
-CACHE_PATH = Path("cache/embeddings.json")
-CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+# Cache file locations (ignored by Git)
+CACHE_DIR = Path("cache")
+EMB_PATH = CACHE_DIR / "embeddings.npy"
+META_PATH = CACHE_DIR / "meta.msgpack"
+LEGACY_JSON_PATH = CACHE_DIR / "embeddings.json"
+CACHE_DIR.mkdir(parents=True, exist_ok=True)
+
+# Minimum number of rows allocated when the matrix has to grow
+_MIN_CAPACITY = 64
 
 
 class CacheManager:
-    def __init__(self, path: Path = CACHE_PATH):
-        self.path = path
-        self._data: Dict[str, Any] = {}
+    def __init__(self, emb_path: Path = EMB_PATH, meta_path: Path = META_PATH,
+                 legacy_path: Path = LEGACY_JSON_PATH):
+        self.emb_path = emb_path
+        self.meta_path = meta_path
+        self.legacy_path = legacy_path
+        self._mat: Optional[np.memmap] = None
+        self._meta: Dict[str, Dict[str, Any]] = {}
         self._load()
 
     # ---------------------------------------------------------
     # INTERNAL LOAD/SAVE
     # ---------------------------------------------------------
     def _load(self):
-        """Load cache JSON if it exists."""
-        if self.path.exists():
-            try:
-                with open(self.path, "r", encoding="utf-8") as f:
-                    self._data = json.load(f)
-            except json.JSONDecodeError:
-                # If cache is corrupted, reset it
-                self._data = {}
-        else:
-            self._data = {}
+        """Memory-map the embedding matrix and load the metadata if both exist."""
+        if not (self.emb_path.exists() and self.meta_path.exists()):
+            self._mat, self._meta = None, {}
+            return
+
+        try:
+            self._meta = msgpack.unpackb(self.meta_path.read_bytes())
+            self._mat = np.load(self.emb_path, mmap_mode="r+")
+        except (msgpack.UnpackException, ValueError, OSError):
+            # If cache is corrupted, reset it
+            self._mat, self._meta = None, {}
+            return
+
+        # Rows referenced by the metadata must exist in the matrix
+        if self._meta and max(e["row"] for e in self._meta.values()) >= self._mat.shape[0]:
+            self._mat, self._meta = None, {}
 
     def save(self):
-        """Write all cached entries back to JSON."""
-        with open(self.path, "w", encoding="utf-8") as f:
-            json.dump(self._data, f, indent=2)
+        """Flush the embedding matrix and write the (small) metadata file."""
+        if self._mat is not None:
+            self._mat.flush()
+        self.meta_path.write_bytes(msgpack.packb(self._meta))
+
+    def import_legacy_json(self):
+        """
+        One-time migration of the old JSON cache
+        ({doc_id: {"embedding": [...], "hash": ..., "updated_at": ...}}).
+        Only runs if no sidecar exists yet (not even an empty one from clear()).
+        This writes the cache, so only the index builder calls it, never the
+        read-only query path.
+
+        Rows are decoded straight into a preallocated float32 matrix with
+        np.fromiter, with no intermediate arrays or final vstack. Malformed
+        entries are skipped (they will simply be re-embedded).
+        """
+        if self.meta_path.exists() or not self.legacy_path.exists():
+            return
+
+        try:
+            data = orjson.loads(self.legacy_path.read_bytes())
+        except (orjson.JSONDecodeError, OSError):
+            return  # unreadable legacy cache: start empty, as before
+        if not isinstance(data, dict):
+            return
+
+        entries = [
+            (doc_id, e) for doc_id, e in data.items()
+            if isinstance(e, dict) and isinstance(e.get("hash"), str)
+            and isinstance(e.get("embedding"), list) and e["embedding"]
+        ]
+        if not entries:
+            return
+
+        # All rows must share one dimension: keep the entries matching the first
+        dim = len(entries[0][1]["embedding"])
+        entries = [(doc_id, e) for doc_id, e in entries if len(e["embedding"]) == dim]
+        self._ensure_capacity(len(entries), dim)
+        now = int(time.time())
+        for doc_id, entry in entries:
+            row = len(self._meta)
+            try:
+                self._mat[row] = np.fromiter(entry["embedding"], dtype=np.float32, count=dim)
+            except (TypeError, ValueError):
+                continue  # non-numeric values: skip, row is reused by the next entry
+            self._meta[doc_id] = {
+                "row": row,
+                "hash": entry["hash"],
+                "updated_at": entry.get("updated_at", now)
+            }
+        self.save()
+        print(f"Imported {len(self._meta)} embeddings from legacy cache {self.legacy_path}.")
+
+    def _ensure_capacity(self, n_rows: int, dim: int):
+        """Grow the memory-mapped matrix (doubling) so it holds at least n_rows."""
+        if self._mat is not None and self._mat.shape[0] >= n_rows:
+            return
+
+        old_capacity = 0 if self._mat is None else self._mat.shape[0]
+        capacity = max(n_rows, 2 * old_capacity, _MIN_CAPACITY)
+
+        tmp_path = self.emb_path.with_suffix(".tmp.npy")
+        new_mat = np.lib.format.open_memmap(
+            tmp_path, mode="w+", dtype=np.float32, shape=(capacity, dim)
+        )
+        if self._mat is not None:
+            used = len(self._meta)
+            new_mat[:used] = self._mat[:used]
+        new_mat.flush()
+        os.replace(tmp_path, self.emb_path)
+        self._mat = new_mat
 
     # ---------------------------------------------------------
     # BASIC OPERATIONS
     # ---------------------------------------------------------
-    def get(self, doc_id: str) -> Optional[Dict[str, Any]]:
-        """Return cache entry for doc_id, or None if missing."""
-        return self._data.get(doc_id)
+    def get(self, doc_id: str) -> Optional[np.ndarray]:
+        """Return the cached embedding row for doc_id (zero-copy view), or None if missing."""
+        entry = self._meta.get(doc_id)
+        if entry is None:
+            return None
+        return self._mat[entry["row"]]
 
-    def set(self, doc_id: str, embedding: List[float], hash_str: str):
+    def set(self, doc_id: str, embedding, hash_str: str):
         """Add or update a cache entry."""
-        self._data[doc_id] = {
-            "doc_id": doc_id,
-            "embedding": embedding,
-            "hash": hash_str,
-            "updated_at": int(time.time())
-        }
+        self.set_many([(doc_id, embedding, hash_str)])
+
+    def set_many(self, entries: Iterable[Tuple[str, Any, str]]):
+        """
+        Add or update several (doc_id, embedding, hash) entries, growing the
+        matrix at most once and saving once at the end.
+        """
+        entries = list(entries)
+        if not entries:
+            return
+
+        # Assign rows first: existing docs keep theirs, new docs are appended
+        rows = []
+        next_row = len(self._meta)
+        for doc_id, _, _ in entries:
+            entry = self._meta.get(doc_id)
+            if entry is not None:
+                rows.append(entry["row"])
+            else:
+                rows.append(next_row)
+                next_row += 1
+
+        dim = np.shape(entries[0][1])[0]
+        self._ensure_capacity(next_row, dim)
+
+        now = int(time.time())
+        for row, (doc_id, embedding, hash_str) in zip(rows, entries):
+            self._mat[row] = embedding
+            self._meta[doc_id] = {
+                "row": row,
+                "hash": hash_str,
+                "updated_at": now
+            }
         self.save()
 
+    def matrix(self, doc_ids: List[str]) -> np.ndarray:
+        """
+        Return the (len(doc_ids), dim) float32 matrix of cached embeddings,
+        in the order of doc_ids. Every doc_id must be cached.
+        """
+        rows = [self._meta[doc_id]["row"] for doc_id in doc_ids]
+        if rows == list(range(len(rows))):
+            # Rows are already laid out in order: hand out a view, no copy
+            return self._mat[:len(rows)]
+        return self._mat[rows]
+
     # ---------------------------------------------------------
     # BULK VALIDATION
     # ---------------------------------------------------------
-    def bulk_get_changed(self, metas: List[Dict[str, Any]]) -> Dict[str, Optional[Dict]]:
+    def bulk_get_changed(self, metas: List[Dict[str, Any]]) -> Dict[str, Optional[np.ndarray]]:
         """
         For each metadata entry:
-            If document is cached AND hash matches   → return cached entry
+            If document is cached AND hash matches   → return cached embedding row
             If missing OR hash changed               → return None
-        Returns dict: {doc_id: cache_entry_or_None}
+        Returns dict: {doc_id: embedding_or_None}
         """
         result = {}
         for meta in metas:
             doc_id = meta["doc_id"]
-            cached = self.get(doc_id)
-            if cached and cached.get("hash") == meta["hash"]:
-                result[doc_id] = cached     # use cached vector
+            entry = self._meta.get(doc_id)
+            if entry is not None and entry["hash"] == meta["hash"]:
+                result[doc_id] = self._mat[entry["row"]]    # use cached vector
             else:
-                result[doc_id] = None       # needs re-embedding
+                result[doc_id] = None                       # needs re-embedding
         return result
 
     # ---------------------------------------------------------
@@ -88,6 +226,9 @@ class CacheManager:
     # ---------------------------------------------------------
     def clear(self):
         """Remove ALL cached embeddings."""
-        self._data = {}     # reset actual cache dictionary
-        self.save()         # persist as empty file
+        self._meta = {}     # reset metadata
+        self._mat = None    # drop the memory map before deleting its file
+        if self.emb_path.exists():
+            self.emb_path.unlink()
+        self.save()         # persist empty metadata
         print("Cache cleared.")
@@ -1,6 +1,8 @@
 # src/create_metadata.py
 
-import json
+from pathlib import Path
+
+import orjson
 from src.preprocess import save_docs, build_metadata
 
 LIMIT = 200
@@ -14,8 +16,7 @@ def main():
     metas = build_metadata(limit=LIMIT)
 
     # Step 3: Save metadata.json
-    with open("data/metadata.json", "w", encoding="utf-8") as f:
-        json.dump({m["doc_id"]: m for m in metas}, f, indent=4)
+    Path("data/metadata.json").write_bytes(orjson.dumps({m["doc_id"]: m for m in metas}))
 
     print(f"Saved metadata for {len(metas)} documents to data/metadata.json.")
 
@@ -0,0 +1,17 @@
+# src/doc_store.py
+"""
+Cached document reader used by the query pipeline for result snippets,
+so each result file is read at most once instead of on every query.
+
+Documents are immutable between index builds, so caching by path is safe
+for the lifetime of a running pipeline.
+"""
+
+from functools import lru_cache
+
+
+@lru_cache(maxsize=512)
+def read_doc(path: str) -> str:
+    """Return the full text of a document (raises OSError if unreadable)."""
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
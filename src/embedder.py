@@ -85,31 +85,33 @@ class Embedder:
             except Exception as e:
                 raise RuntimeError("Failed to initialize SentenceTransformer from local_folder") from e
 
-    def _normalize(self, vectors: np.ndarray) -> np.ndarray:
-        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
-        norms[norms == 0.0] = 1.0
-        return vectors / norms
-
-    def embed_texts(self, texts, batch_size: int = 32):
+    def embed_texts(self, texts, batch_size: int = 32, progress: bool = False) -> np.ndarray:
         """
-        Embed a list of texts (documents). Returns list[list[float]] normalized to unit length.
+        Embed a list of texts (documents) in a single encode call.
+        Returns a (len(texts), dim) float32 array normalized to unit length.
+
+        SentenceTransformer.encode already sorts inputs by length before
+        batching (and restores the original order), so padding waste is
+        minimized without sorting here as well. Normalization also happens
+        inside encode (per batch, on the model's tensors).
+
+        progress: show a tqdm progress bar (useful for long indexing runs only).
         """
-        emb = self.model.encode(
+        return self.model.encode(
             texts,
             batch_size=batch_size,
             convert_to_numpy=True,
-            show_progress_bar=True
+            normalize_embeddings=True,
+            show_progress_bar=progress
         )
-        emb = self._normalize(emb)
-        return emb.astype("float32").tolist()
 
-    def embed_query(self, query: str):
+    def embed_query(self, query: str) -> np.ndarray:
         """
-        Embed a single query string and normalize.
+        Embed a single query string and normalize. Returns a 1-D float32 array.
         """
-        vec = self.model.encode([query], convert_to_numpy=True)[0]
-        norm = np.linalg.norm(vec)
-        if norm == 0:
-            return vec.astype("float32").tolist()
-        vec = vec / norm
-        return vec.astype("float32").tolist()
+        return self.model.encode(
+            [query],
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )[0]
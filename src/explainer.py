@@ -11,21 +11,21 @@ For each (query, document) pair we produce:
 
 import re
 import math
-from typing import List, Dict, Tuple, Set
+from functools import lru_cache
+from typing import List, Dict, Tuple, AbstractSet, FrozenSet, Any
 
 # Very small stopword list; keep it tiny for clarity
-_STOPWORDS = {
+_STOPWORDS = frozenset({
     "the","is","in","and","of","a","an","to","for","on","with","that",
     "this","it","as","are","be","by","or","from","at","was","which","we","you"
-}
+})
 
 _TOKEN_RE = re.compile(r"\w+")
 
 def simple_tokenize(text: str) -> List[str]:
     if not text:
         return []
-    tokens = _TOKEN_RE.findall(text.lower())
-    return tokens
+    return _TOKEN_RE.findall(text.lower())
 
 def extract_keywords(text: str, use_stopwords: bool = True) -> List[str]:
     tokens = simple_tokenize(text)
@@ -34,29 +34,35 @@ def extract_keywords(text: str, use_stopwords: bool = True) -> List[str]:
     else:
         return tokens
 
-def keyword_overlap(query: str, doc_text: str, top_n: int = 10) -> Tuple[List[str], float]:
-    q_keywords = extract_keywords(query)
-    if not q_keywords:
+@lru_cache(maxsize=1024)
+def _query_keyword_set(query: str) -> FrozenSet[str]:
+    # One query is explained against every top_k result (and popular queries
+    # repeat), so tokenize it once instead of once per result.
+    return frozenset(extract_keywords(query))
+
+def keyword_overlap(query: str, doc_set: AbstractSet[str], top_n: int = 10) -> Tuple[List[str], float]:
+    q_set = _query_keyword_set(query)
+    if not q_set:
         return [], 0.0
-    q_set = set(q_keywords)
-    d_keywords = extract_keywords(doc_text)
-    d_set = set(d_keywords)
 
-    overlap = q_set & d_set
-    overlap_list = sorted(overlap, key=lambda x: (- (x in d_set), x))  # stable list
+    overlap = q_set.intersection(doc_set)
+    overlap_list = sorted(overlap)  # stable list
 
     overlap_ratio = len(overlap) / max(1, len(q_set))
-    return list(overlap_list)[:top_n], float(overlap_ratio)
+    return overlap_list[:top_n], float(overlap_ratio)
 
-def doc_length_norm(doc_text: str) -> float:
+def doc_length_norm(n_tokens: int) -> float:
     # Normalize doc-length to [0, 1] where shorter docs produce slightly higher scores
-    tokens = simple_tokenize(doc_text)
-    n = max(1, len(tokens))
+    n = max(1, n_tokens)
     return 1.0 / (1.0 + math.log(1 + n))
 
-def explain_match(query: str, doc_text: str) -> Dict:
-    overlap_list, overlap_ratio = keyword_overlap(query, doc_text)
-    length_norm = doc_length_norm(doc_text)
+def explain_match(query: str, doc_meta: Dict[str, Any]) -> Dict:
+    """
+    doc_meta is the document's metadata entry, which carries the keyword set
+    and token count precomputed at index-build time (see preprocess.build_metadata).
+    """
+    overlap_list, overlap_ratio = keyword_overlap(query, doc_meta["keywords"])
+    length_norm = doc_length_norm(doc_meta["n_tokens"])
 
     # "Why matched" description as a small human-friendly sentence
     if overlap_list:
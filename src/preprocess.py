@@ -12,10 +12,13 @@ import re
 import hashlib
 from sklearn.datasets import fetch_20newsgroups
 
+from src.explainer import simple_tokenize, extract_keywords
+
 DATA_DIR = Path("data/docs")
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 
 _HTML_TAG_RE = re.compile(r"<[^>]+>")
+_WHITESPACE_RE = re.compile(r"\s+")
 
 def strip_html(text: str) -> str:
     """Remove HTML tags."""
@@ -28,13 +31,9 @@ def clean_text(text: str) -> str:
     text = strip_html(text)
     text = text.lower()
     # collapse whitespace and newlines
-    text = re.sub(r"\s+", " ", text).strip()
+    text = _WHITESPACE_RE.sub(" ", text).strip()
     return text
 
-def compute_sha256(text: str) -> str:
-    """Return SHA256 hex digest for a given text."""
-    return hashlib.sha256(text.encode("utf-8")).hexdigest()
-
 def save_docs(limit: int = 200) -> int:
     """
     Fetches 20newsgroups (train) and saves up to `limit` cleaned docs
@@ -51,23 +50,31 @@ def save_docs(limit: int = 200) -> int:
         saved += 1
         doc_id = f"doc_{saved:03d}"
         path = DATA_DIR / f"{doc_id}.txt"
-        path.write_text(text, encoding="utf-8")
+        path.write_bytes(text.encode("utf-8"))
     return saved
 
 def build_metadata(limit: int = 200):
     """
     Scans data/docs/doc_*.txt (sorted) and returns a list of metadata dicts:
-    [{"doc_id": "doc_001", "path": "data/docs/doc_001.txt", "hash": "...", "length": 1234}, ...]
+    [{"doc_id": "doc_001", "path": "data/docs/doc_001.txt", "hash": "...", "length": 1234,
+      "keywords": ["..."], "n_tokens": 210}, ...]
+    "length" is the file size in bytes. "keywords" (sorted, stopwords removed)
+    and "n_tokens" are precomputed for the ranking explainer so queries never
+    need to re-read or re-tokenize documents.
     """
     metas = []
     files = sorted(DATA_DIR.glob("doc_*.txt"))
     for p in files[:limit]:
-        text = p.read_text(encoding="utf-8")
+        # One read per file: hash the raw bytes, tokenize the decoded text
+        data = p.read_bytes()
+        text = data.decode("utf-8")
         metas.append({
             "doc_id": p.stem,
             "path": str(p),
-            "hash": compute_sha256(text),
-            "length": len(text)
+            "hash": hashlib.sha256(data).hexdigest(),
+            "length": len(data),
+            "keywords": sorted(set(extract_keywords(text))),
+            "n_tokens": len(simple_tokenize(text))
         })
     return metas
 
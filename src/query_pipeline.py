@@ -5,8 +5,7 @@ Final Query Pipeline for CodeAtRandom Assignment
 
 Combines:
 - Embedder
-- FAISS SearchEngine
-- Ranker
+- FAISS SearchEngine (results come back sorted by score)
 - Metadata lookup
 
 Provides:
@@ -15,11 +14,10 @@ Provides:
 - QueryPipeline.run_cli() -> interactive search console
 """
 
-import json
 from typing import List, Dict
 
 from src.search_engine import SearchEngine
-from src.ranker import Ranker
+from src.doc_store import read_doc
 
 
 class QueryPipeline:
@@ -30,16 +28,16 @@ class QueryPipeline:
         self.search_engine = SearchEngine()
         self.search_engine.load_index()
 
-        self.ranker = Ranker()
+        # Share the metadata the search engine already loaded (one copy per process)
+        self.metadata = self.search_engine.metadata
 
-        # Load metadata file
-        try:
-            with open("data/metadata.json", "r", encoding="utf-8") as f:
-                self.metadata = json.load(f)
-        except FileNotFoundError:
-            raise RuntimeError(
-                "metadata.json not found. Run preprocessing + metadata creation first."
-            )
+        # Keyword lists -> frozensets once, so explanations intersect in O(query tokens)
+        for meta in self.metadata.values():
+            if "keywords" not in meta:
+                raise RuntimeError(
+                    "metadata.json is missing keywords. Re-run metadata creation."
+                )
+            meta["keywords"] = frozenset(meta["keywords"])
 
         print("✅ Query Pipeline ready.")
 
@@ -51,8 +49,7 @@ class QueryPipeline:
         Runs:
         1. embedding
         2. vector search
-        3. ranking
-        4. snippet extraction
+        3. snippet extraction
 
         Returns structured results:
         [
@@ -66,20 +63,16 @@ class QueryPipeline:
         ]
         """
 
-        # Step 1 — search FAISS index
-        results = self.search_engine.search(query, top_k=top_k)
+        # Step 1 — search FAISS index (already sorted by descending cosine similarity)
+        ranked = self.search_engine.search(query, top_k=top_k)[:top_k]
 
-        # Step 2 — rerank by cosine similarity
-        ranked = self.ranker.rerank(results, top_k=top_k)
-
-        # Step 3 — attach text snippets
+        # Step 2 — attach text snippets
         final_results = []
         for item in ranked:
             path = item["path"]
 
             try:
-                with open(path, "r", encoding="utf-8") as f:
-                    text = f.read()
+                text = read_doc(path)  # cached, used for snippets only
             except FileNotFoundError:
                 snippet = "[File not found]"
             else:
@@ -6,11 +6,19 @@ FAISS already returns cosine similarity scores because:
 - We use inner product (IP)
 - Embeddings are L2-normalized
 
-So ranking = simply sorting results by score (descending).
+FAISS also returns its hits already sorted by score (descending), so the
+query pipeline no longer calls rerank(); it is kept as a cheap truncation for
+callers that still use it.
+
+Any similarity computed outside FAISS goes through Ranker.cosine, which uses
+SimSIMD's SIMD kernels (AVX-512 / NEON) instead of a NumPy dot + norms.
 """
 
 from typing import List, Dict
 
+import numpy as np
+import simsimd
+
 
 class Ranker:
     def __init__(self):
@@ -26,11 +34,12 @@ class Ranker:
             ]
 
         Output:
-            Same structure, but sorted by descending score.
+            Same structure, truncated to top_k. FAISS results are already
+            sorted by descending score, so no sort is needed.
         """
+        return results[:top_k]
 
-        # Sort highest similarity score first
-        ranked = sorted(results, key=lambda x: x["score"], reverse=True)
-
-        # Return only the top_k results
-        return ranked[:top_k]
+    @staticmethod
+    def cosine(a: np.ndarray, b: np.ndarray) -> float:
+        """Cosine similarity of two 1-D float32 vectors (SimSIMD returns the distance)."""
+        return 1.0 - float(simsimd.cosine(a, b))
@@ -11,13 +11,16 @@ Uses:
 
 Output:
 - vector_store/vector_index.faiss   (FAISS index)
-- vector_store/id_map.json          (map: position -> doc_id)
+- vector_store/id_map.msgpack       (list: FAISS position -> doc_id)
 """
 
 import os
-import json
-import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
 import faiss
+import msgpack
+import orjson
 
 from src.embedder import Embedder
 from src.cache_manager import CacheManager
@@ -26,11 +29,17 @@ from src.cache_manager import CacheManager
 # Directory to store FAISS index + id map
 VECTOR_DIR = "vector_store"
 INDEX_PATH = os.path.join(VECTOR_DIR, "vector_index.faiss")
-IDMAP_PATH = os.path.join(VECTOR_DIR, "id_map.json")
+IDMAP_PATH = os.path.join(VECTOR_DIR, "id_map.msgpack")
 
 # Preprocessing metadata file
 METADATA_PATH = "data/metadata.json"
 
+# HNSW (+ int8 scalar quantizer) parameters (used once the corpus outgrows exact search)
+FLAT_MAX_DOCS = 1000        # corpora smaller than this keep the exact Flat index
+HNSW_M = 32                 # neighbours per graph node
+HNSW_EF_CONSTRUCTION = 200  # build-time search depth (graph quality)
+HNSW_EF_SEARCH = 64         # query-time search depth (recall vs latency)
+
 
 class SearchEngine:
     def __init__(self):
@@ -44,63 +53,81 @@ class SearchEngine:
         if not os.path.exists(METADATA_PATH):
             raise FileNotFoundError("Metadata file not found. Run preprocessing first.")
 
-        with open(METADATA_PATH, "r", encoding="utf-8") as f:
-            self.metadata = json.load(f)
+        self.metadata = orjson.loads(Path(METADATA_PATH).read_bytes())
 
         self.index = None
         self.id_map = None
 
+    # ---------------------------------------------------------
+    # INDEX FACTORY
+    # ---------------------------------------------------------
+    @staticmethod
+    def _create_index(dim: int, n_docs: int, use_hnsw=None):
+        """
+        Inner-product index for L2-normalized vectors (= cosine similarity).
+        use_hnsw=None picks automatically: exact Flat for small corpora,
+        HNSW graph over int8 scalar-quantized vectors for larger ones
+        (1 byte per dim instead of 4; queries stay float32).
+        """
+        if use_hnsw is None:
+            use_hnsw = n_docs >= FLAT_MAX_DOCS
+
+        if not use_hnsw:
+            return faiss.IndexFlatIP(dim)
+
+        index = faiss.IndexHNSWSQ(
+            dim, faiss.ScalarQuantizer.QT_8bit, HNSW_M, faiss.METRIC_INNER_PRODUCT
+        )
+        index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+        return index
+
     # ---------------------------------------------------------
     # BUILD THE FAISS INDEX (Task 3)
     # ---------------------------------------------------------
-    def build_index(self, batch_size: int = 32):
+    def build_index(self, batch_size: int = 32, use_hnsw=None):
         print("🔧 Building FAISS index...")
 
         # Metadata contains: doc_id, path, hash, length
         all_docs = list(self.metadata.values())
         doc_ids = [meta["doc_id"] for meta in all_docs]
 
-        # Load texts
-        texts = []
-        for meta in all_docs:
-            with open(meta["path"], "r", encoding="utf-8") as f:
-                texts.append(f.read())
-
         # ----------------------------------------------
         # Check Cache Before Computing Embeddings
         # ----------------------------------------------
-        embeddings = []
-        to_compute = []
-        compute_indices = []
-
-        for i, meta in enumerate(all_docs):
-            cached = self.cache.get(meta["doc_id"])
-
-            if cached:
-                embeddings.append(np.array(cached["embedding"], dtype="float32"))
-            else:
-                to_compute.append(texts[i])
-                compute_indices.append(i)
-                embeddings.append(None)
-
-        # Compute any missing embeddings
-        if to_compute:
+        # Carry over embeddings from an old JSON cache, if any (one-time)
+        self.cache.import_legacy_json()
+        cached = self.cache.bulk_get_changed(all_docs)
+        compute_indices = [i for i, meta in enumerate(all_docs) if cached[meta["doc_id"]] is None]
+
+        # Compute any missing (or changed) embeddings
+        if compute_indices:
+            # Load texts only for the documents that need embedding.
+            # File reads release the GIL, so a thread pool overlaps the I/O.
+            paths = [all_docs[idx]["path"] for idx in compute_indices]
+            with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as ex:
+                to_compute = list(ex.map(lambda p: Path(p).read_text(encoding="utf-8"), paths))
+
             print(f"⚡ Computing {len(to_compute)} embeddings...")
-            new_embs = self.embedder.embed_texts(to_compute, batch_size=batch_size)
+            new_embs = self.embedder.embed_texts(to_compute, batch_size=batch_size, progress=True)
 
-            for idx, emb in zip(compute_indices, new_embs):
-                doc_meta = all_docs[idx]
-                self.cache.set(doc_meta["doc_id"], emb, doc_meta["hash"])
-                embeddings[idx] = np.array(emb, dtype="float32")
+            # One cache write for the whole batch
+            self.cache.set_many(
+                (all_docs[idx]["doc_id"], emb, all_docs[idx]["hash"])
+                for idx, emb in zip(compute_indices, new_embs)
+            )
 
-        # Convert to FAISS matrix
-        embeddings = np.vstack(embeddings)  # shape: (N, dim)
+        # FAISS matrix straight from the memory-mapped cache, shape: (N, dim)
+        embeddings = self.cache.matrix(doc_ids)
 
         # ----------------------------------------------
-        # Build FAISS INDEX (Inner Product)
+        # Build FAISS INDEX (Inner Product, Flat or HNSW)
         # ----------------------------------------------
         dim = embeddings.shape[1]
-        index = faiss.IndexFlatIP(dim)
+        index = self._create_index(dim, len(doc_ids), use_hnsw)
+
+        # SQ8 learns per-dimension ranges before vectors can be added
+        if not index.is_trained:
+            index.train(embeddings)
 
         # Add vectors to FAISS
         index.add(embeddings)
@@ -108,10 +135,9 @@ class SearchEngine:
         # Save index
         faiss.write_index(index, INDEX_PATH)
 
-        # Save ID Map
-        id_map = {i: doc_id for i, doc_id in enumerate(doc_ids)}
-        with open(IDMAP_PATH, "w", encoding="utf-8") as f:
-            json.dump(id_map, f, indent=4)
+        # Save ID Map (row position == FAISS id)
+        with open(IDMAP_PATH, "wb") as f:
+            f.write(msgpack.packb(doc_ids))
 
         print("✅ FAISS index saved.")
         print("📌 Index:", INDEX_PATH)
@@ -124,10 +150,15 @@ class SearchEngine:
         if not os.path.exists(INDEX_PATH):
             raise RuntimeError("FAISS index missing. Run build_index() first.")
 
+        # The index is read onto the heap. Worker processes only share it when
+        # it is loaded before forking (gunicorn --preload, see src/api.py),
+        # through copy-on-write.
         self.index = faiss.read_index(INDEX_PATH)
+        if hasattr(self.index, "hnsw"):
+            self.index.hnsw.efSearch = HNSW_EF_SEARCH
 
-        with open(IDMAP_PATH, "r", encoding="utf-8") as f:
-            self.id_map = json.load(f)
+        with open(IDMAP_PATH, "rb") as f:
+            self.id_map = msgpack.unpackb(f.read())  # list indexed by FAISS id
 
         print("📥 Loaded FAISS index & ID map.")
 
@@ -139,20 +170,22 @@ class SearchEngine:
             raise RuntimeError("Index not loaded. Call load_index() first.")
 
         # Embed query
-        qvec = self.embedder.embed_query(query)
-        qvec = np.array([qvec], dtype="float32")
+        qvec = self.embedder.embed_query(query)[None, :]  # shape: (1, dim)
 
         # Search FAISS
         scores, indices = self.index.search(qvec, top_k)
 
         results = []
-        for score, idx in zip(scores[0], indices[0]):
-            doc_id = self.id_map[str(idx)]
+        for score, idx in zip(scores[0].tolist(), indices[0].tolist()):
+            if idx < 0:
+                # FAISS pads with -1 when fewer than top_k vectors are found
+                break
+            doc_id = self.id_map[idx]
             meta = self.metadata[doc_id]
 
             results.append({
                 "doc_id": doc_id,
-                "score": float(score),
+                "score": score,
                 "path": meta["path"]
             })
 